@@ -1,24 +1,51 @@
-from datetime import datetime, timezone
+import os
+import time
 from contextlib import asynccontextmanager
 from pathlib import Path
-from urllib.parse import urlencode
+from urllib.parse import quote_plus
 
+import msgspec
 from fastapi import FastAPI, File, Form, HTTPException, Query, Request, UploadFile
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, Response
+from starlette.concurrency import run_in_threadpool
 
 from app.config import Settings, get_settings
-from app.models import FileListResponse, FileRecord, SignLinkRequest, SignLinkResponse, UploadResponse
+from app.models import (
+    FileListResponse,
+    FileListStruct,
+    FileRecordStruct,
+    SignLinkRequest,
+    SignLinkResponse,
+    SignLinkStruct,
+    UploadResponse,
+)
 from app.repository import FileRepository
-from app.signing import URLSigner
+from app.signing import get_signer
 from app.storage import LocalPrivateStorage
 
+ERROR_CODES = {
+    400: "bad_request",
+    401: "unauthorized",
+    403: "forbidden",
+    404: "not_found",
+    410: "expired",
+    413: "payload_too_large",
+}
+
+json_encoder = msgspec.json.Encoder()
+
+
+def msgspec_response(content: msgspec.Struct, status_code: int = 200) -> Response:
+    return Response(content=json_encoder.encode(content), status_code=status_code, media_type="application/json")
+
+
 def create_app(settings: Settings | None = None) -> FastAPI:
     settings = settings or get_settings()
 
     repository = FileRepository(settings.database_path)
     storage = LocalPrivateStorage(settings.storage_dir)
-    signer = URLSigner(settings.app_secret_key)
+    signer = get_signer(settings.app_secret_key)
 
     @asynccontextmanager
     async def lifespan(_: FastAPI):
@@ -26,6 +53,7 @@ def create_app(settings: Settings | None = None) -> FastAPI:
         repository.init()
         storage.init()
         yield
+        repository.close()
 
     app = FastAPI(title=settings.app_name, lifespan=lifespan)
 
@@ -42,7 +70,7 @@ def create_app(settings: Settings | None = None) -> FastAPI:
     @app.exception_handler(RequestValidationError)
     async def request_validation_exception_handler(_: Request, exc: RequestValidationError):
         missing_fields = [
-            ".".join(str(item) for item in error["loc"] if item != "body")
+            ".".join([str(item) for item in error["loc"] if item != "body"])
             for error in exc.errors()
             if error.get("type") == "missing"
         ]
@@ -55,29 +83,21 @@ def create_app(settings: Settings | None = None) -> FastAPI:
     @app.exception_handler(HTTPException)
     async def http_exception_handler(_: Request, exc: HTTPException):
         message = str(exc.detail) if exc.detail else "request failed"
-        code_map = {
-            400: "bad_request",
-            401: "unauthorized",
-            403: "forbidden",
-            404: "not_found",
-            410: "expired",
-            413: "payload_too_large",
-        }
-        return error_response(exc.status_code, message, code_map.get(exc.status_code, "error"))
+        return error_response(exc.status_code, message, ERROR_CODES.get(exc.status_code, "error"))
 
     @app.get("/health")
     def health() -> dict:
         return {"status": "ok", "environment": settings.app_env}
 
     @app.post("/v1/files/upload", response_model=UploadResponse, status_code=201)
-    def upload_file(user_id: str = Form(...), file: UploadFile = File(...)):
+    async def upload_file(user_id: str = Form(...), file: UploadFile = File(...)):
         if not user_id.strip():
             raise HTTPException(status_code=400, detail="user_id is required")
         if not file.filename:
             raise HTTPException(status_code=400, detail="filename is required")
 
         try:
-            file_id, saved_path, size = storage.save_file(
+            file_id, saved_path, size = await storage.save_file(
                 owner_id=user_id,
                 source=file,
                 max_size_bytes=settings.max_upload_size_bytes,
@@ -85,20 +105,22 @@ def create_app(settings: Settings | None = None) -> FastAPI:
         except ValueError as exc:
             raise HTTPException(status_code=413, detail=str(exc)) from exc
 
-        record = repository.create_file(
+        record = await run_in_threadpool(
+            repository.create_file,
             file_id=file_id,
             owner_id=user_id,
             filename=file.filename,
-            storage_path=str(saved_path),
+            storage_path=saved_path,
             size=size,
         )
-        return UploadResponse(**record)
+        return msgspec_response(msgspec.convert(record, FileRecordStruct), status_code=201)
 
     @app.get("/v1/users/{user_id}/files", response_model=FileListResponse)
     def list_owner_files(user_id: str):
         rows = repository.list_files_for_owner(user_id)
-        files = [FileRecord(**row) for row in rows]
-        return FileListResponse(files=files)
+        # convert() type-checks each row, so bad column data fails here instead of
+        # reaching clients.
+        return msgspec_response(FileListStruct(files=msgspec.convert(rows, list[FileRecordStruct])))
 
     @app.post("/v1/files/{file_id}/sign", response_model=SignLinkResponse)
     def create_signed_link(file_id: str, payload: SignLinkRequest, request: Request):
@@ -113,32 +135,25 @@ def create_app(settings: Settings | None = None) -> FastAPI:
                 detail=f"ttl_seconds must be <= {settings.max_ttl_seconds}",
             )
 
-        file_row = repository.get_file(file_id)
+        file_row = repository.get_file_and_record_link(
+            file_id=file_id,
+            owner_id=payload.owner_id,
+            ttl_seconds=payload.ttl_seconds,
+        )
         if not file_row:
             raise HTTPException(status_code=404, detail="file not found")
         if file_row["owner_id"] != payload.owner_id:
             raise HTTPException(status_code=403, detail="forbidden")
 
-        expires_at = int(datetime.now(timezone.utc).timestamp()) + payload.ttl_seconds
+        expires_at = int(time.time()) + payload.ttl_seconds
         signature = signer.sign(file_id=file_id, owner_id=payload.owner_id, expires_at=expires_at)
 
-        repository.record_link_generation(
-            file_id=file_id,
-            owner_id=payload.owner_id,
-            ttl_seconds=payload.ttl_seconds,
-        )
+        # file_id comes from our own table, exp is an int and sig is hex, so only
+        # owner_id needs escaping.
+        base = str(request.base_url).rstrip("/") + "/v1/files/download?"
+        signed_url = f"{base}file_id={file_id}&owner_id={quote_plus(payload.owner_id)}&exp={expires_at}&sig={signature}"
 
-        params = urlencode(
-            {
-                "file_id": file_id,
-                "owner_id": payload.owner_id,
-                "exp": expires_at,
-                "sig": signature,
-            }
-        )
-        signed_url = str(request.base_url)[:-1] + f"/v1/files/download?{params}"
-
-        return SignLinkResponse(file_id=file_id, expires_at=expires_at, signed_url=signed_url)
+        return msgspec_response(SignLinkStruct(file_id=file_id, expires_at=expires_at, signed_url=signed_url))
 
     @app.get("/v1/files/download")
     def download_file(
@@ -147,7 +162,7 @@ def create_app(settings: Settings | None = None) -> FastAPI:
         exp: int = Query(...),
         sig: str = Query(...),
     ):
-        now = int(datetime.now(timezone.utc).timestamp())
+        now = int(time.time())
         if exp < now:
             raise HTTPException(status_code=410, detail="link expired")
         if not signer.verify(file_id=file_id, owner_id=owner_id, expires_at=exp, signature=sig):
@@ -159,11 +174,19 @@ def create_app(settings: Settings | None = None) -> FastAPI:
         if file_row["owner_id"] != owner_id:
             raise HTTPException(status_code=403, detail="forbidden")
 
-        file_path = Path(file_row["storage_path"])
-        if not file_path.exists():
-            raise HTTPException(status_code=404, detail="file content missing")
-
-        return FileResponse(path=file_path, filename=file_row["filename"], media_type="application/octet-stream")
+        file_path = file_row["storage_path"]
+        try:
+            # Handing the stat to FileResponse saves it a second stat in a worker thread.
+            stat_result = os.stat(file_path)
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="file content missing") from None
+
+        return FileResponse(
+            path=file_path,
+            filename=file_row["filename"],
+            media_type="application/octet-stream",
+            stat_result=stat_result,
+        )
 
     return app
 
@@ -1,5 +1,4 @@
-from datetime import datetime
-
+import msgspec
 from pydantic import BaseModel, Field
 
 
@@ -8,7 +7,7 @@ class FileRecord(BaseModel):
     owner_id: str
     filename: str
     size: int
-    uploaded_at: datetime
+    uploaded_at: int
 
 
 class UploadResponse(BaseModel):
@@ -16,7 +15,7 @@ class UploadResponse(BaseModel):
     owner_id: str
     filename: str
     size: int
-    uploaded_at: datetime
+    uploaded_at: int
 
 
 class SignLinkRequest(BaseModel):
@@ -32,3 +31,23 @@ class SignLinkResponse(BaseModel):
 
 class FileListResponse(BaseModel):
     files: list[FileRecord]
+
+
+# msgspec mirrors of the hot response models. Handlers encode these directly, while
+# the pydantic models above stay as the documented response_model for OpenAPI.
+class FileRecordStruct(msgspec.Struct):
+    file_id: str
+    owner_id: str
+    filename: str
+    size: int
+    uploaded_at: int
+
+
+class FileListStruct(msgspec.Struct):
+    files: list[FileRecordStruct]
+
+
+class SignLinkStruct(msgspec.Struct):
+    file_id: str
+    expires_at: int
+    signed_url: str
@@ -1,28 +1,75 @@
 import sqlite3
+import threading
+import time
 from contextlib import contextmanager
-from datetime import datetime, timezone
 
 
-def utc_now_iso() -> str:
-    return datetime.now(timezone.utc).isoformat()
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA cache_size=-32768",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA temp_store=MEMORY",
+)
+
+# Shared by every audit insert so the cached connection reuses one prepared statement.
+INSERT_LINK_AUDIT_SQL = "INSERT INTO link_audit(file_id, owner_id, ttl_seconds, generated_at) VALUES(?, ?, ?, ?)"
+
+# Stays under SQLITE_MAX_VARIABLE_NUMBER on builds older than 3.32 (999).
+MAX_SQL_VARIABLES = 900
+
+# Columns that older databases stored as ISO-8601 TEXT and are now INTEGER epoch seconds.
+EPOCH_COLUMNS = (("files", "uploaded_at"), ("link_audit", "generated_at"))
+
+
+def _to_epoch_sql(column: str) -> str:
+    # Numeric strings were written by int(time.time()) into a TEXT column; anything else
+    # is an ISO-8601 timestamp from the original schema.
+    return (
+        f"CASE WHEN CAST({column} AS INTEGER) || '' = {column} THEN CAST({column} AS INTEGER) "
+        f"ELSE CAST(strftime('%s', {column}) AS INTEGER) END"
+    )
 
 
 class FileRepository:
     def __init__(self, db_path: str):
         self.db_path = db_path
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
 
     @contextmanager
-    def _connect(self):
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        try:
+    def _connect(self, *, write: bool = False):
+        conn = self._conn
+        if conn is None:
+            raise RuntimeError("FileRepository.init() must be called before use")
+        if not write:
             yield conn
-            conn.commit()
-        finally:
-            conn.close()
+            return
+        with self._lock:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
 
     def init(self) -> None:
-        with self._connect() as conn:
+        if self._conn is None:
+            # The connection is shared by the threadpool that runs sync endpoints;
+            # writes are serialized through self._lock.
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+            self._conn.row_factory = sqlite3.Row
+            for pragma in PRAGMAS:
+                self._conn.execute(pragma)
+        with self._connect(write=True) as conn:
+            legacy = []
+            for table, column in EPOCH_COLUMNS:
+                types = {row["name"]: row["type"] for row in conn.execute(f"PRAGMA table_info({table})")}
+                if types.get(column, "INTEGER").upper() != "INTEGER":
+                    conn.execute(f"ALTER TABLE {table} RENAME TO {table}_legacy")
+                    legacy.append((table, column, list(types)))
             conn.execute(
                 """
                 CREATE TABLE IF NOT EXISTS files (
@@ -31,7 +78,7 @@ class FileRepository:
                     filename TEXT NOT NULL,
                     storage_path TEXT NOT NULL UNIQUE,
                     size INTEGER NOT NULL,
-                    uploaded_at TEXT NOT NULL
+                    uploaded_at INTEGER NOT NULL
                 );
                 """
             )
@@ -42,10 +89,21 @@ class FileRepository:
                     file_id TEXT NOT NULL,
                     owner_id TEXT NOT NULL,
                     ttl_seconds INTEGER NOT NULL,
-                    generated_at TEXT NOT NULL
+                    generated_at INTEGER NOT NULL
                 );
                 """
             )
+            for table, column, columns in legacy:
+                selected = ", ".join(_to_epoch_sql(name) if name == column else name for name in columns)
+                conn.execute(
+                    f"INSERT INTO {table}({', '.join(columns)}) SELECT {selected} FROM {table}_legacy"
+                )
+                # Dropping the legacy table also drops the indexes that moved with it.
+                conn.execute(f"DROP TABLE {table}_legacy")
+            # Replaced by the ascending index below, which also serves the rowid tiebreak.
+            conn.execute("DROP INDEX IF EXISTS idx_files_owner_uploaded")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_files_owner_uploaded_at ON files(owner_id, uploaded_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_link_audit_file ON link_audit(file_id)")
 
     def create_file(
         self,
@@ -56,8 +114,8 @@ class FileRepository:
         storage_path: str,
         size: int,
     ) -> dict:
-        uploaded_at = utc_now_iso()
-        with self._connect() as conn:
+        uploaded_at = int(time.time())
+        with self._connect(write=True) as conn:
             conn.execute(
                 """
                 INSERT INTO files(file_id, owner_id, filename, storage_path, size, uploaded_at)
@@ -65,11 +123,13 @@ class FileRepository:
                 """,
                 (file_id, owner_id, filename, storage_path, size, uploaded_at),
             )
-            row = conn.execute(
-                "SELECT file_id, owner_id, filename, size, uploaded_at FROM files WHERE file_id = ?",
-                (file_id,),
-            ).fetchone()
-        return dict(row)
+        return {
+            "file_id": file_id,
+            "owner_id": owner_id,
+            "filename": filename,
+            "size": size,
+            "uploaded_at": uploaded_at,
+        }
 
     def get_file(self, file_id: str) -> dict | None:
         with self._connect() as conn:
@@ -83,18 +143,54 @@ class FileRepository:
                 SELECT file_id, owner_id, filename, size, uploaded_at
                 FROM files
                 WHERE owner_id = ?
-                ORDER BY uploaded_at DESC
+                ORDER BY uploaded_at DESC, rowid DESC
                 """,
                 (owner_id,),
             ).fetchall()
         return [dict(row) for row in rows]
 
     def record_link_generation(self, *, file_id: str, owner_id: str, ttl_seconds: int) -> None:
-        with self._connect() as conn:
+        with self._connect(write=True) as conn:
             conn.execute(
-                """
-                INSERT INTO link_audit(file_id, owner_id, ttl_seconds, generated_at)
-                VALUES(?, ?, ?, ?)
-                """,
-                (file_id, owner_id, ttl_seconds, utc_now_iso()),
+                INSERT_LINK_AUDIT_SQL,
+                (file_id, owner_id, ttl_seconds, int(time.time())),
             )
+
+    def get_file_and_record_link(self, *, file_id: str, owner_id: str, ttl_seconds: int) -> dict | None:
+        """Fetch a file and, if owned by owner_id, record the link audit row in the same transaction."""
+        with self._connect(write=True) as conn:
+            row = conn.execute("SELECT * FROM files WHERE file_id = ?", (file_id,)).fetchone()
+            if row is None:
+                return None
+            if row["owner_id"] == owner_id:
+                conn.execute(
+                    INSERT_LINK_AUDIT_SQL,
+                    (file_id, owner_id, ttl_seconds, int(time.time())),
+                )
+        return dict(row)
+
+    def batch_get_files(self, file_ids: list[str]) -> dict[str, dict]:
+        found: dict[str, dict] = {}
+        with self._connect() as conn:
+            for start in range(0, len(file_ids), MAX_SQL_VARIABLES):
+                batch = file_ids[start : start + MAX_SQL_VARIABLES]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(f"SELECT * FROM files WHERE file_id IN ({placeholders})", batch).fetchall()
+                found.update((row["file_id"], dict(row)) for row in rows)
+        return found
+
+    def batch_record_link_generation(self, rows: list[tuple[str, str, int]]) -> None:
+        """Record many (file_id, owner_id, ttl_seconds) link generations in one transaction."""
+        if not rows:
+            return
+        generated_at = int(time.time())
+        with self._connect(write=True) as conn:
+            conn.executemany(
+                INSERT_LINK_AUDIT_SQL,
+                [(file_id, owner_id, ttl_seconds, generated_at) for file_id, owner_id, ttl_seconds in rows],
+            )
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
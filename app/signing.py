@@ -1,18 +1,50 @@
 import hashlib
 import hmac
+from functools import lru_cache
+
+_BLOCK_SIZE = hashlib.sha256().block_size
+_IPAD = bytes(b ^ 0x36 for b in range(256))
+_OPAD = bytes(b ^ 0x5C for b in range(256))
+_SIGNATURE_HEX_LEN = hashlib.sha256().digest_size * 2
+_HEX_LOWER = frozenset("0123456789abcdef")
 
 
 class URLSigner:
     def __init__(self, secret_key: str):
         self.secret_key = secret_key.encode("utf-8")
+        # HMAC-SHA256 (RFC 2104) with the padded-key blocks absorbed once; each
+        # signature only copies the two hash states instead of rebuilding them.
+        key = self.secret_key
+        if len(key) > _BLOCK_SIZE:
+            key = hashlib.sha256(key).digest()
+        key = key.ljust(_BLOCK_SIZE, b"\0")
+        self._inner = hashlib.sha256(key.translate(_IPAD))
+        self._outer = hashlib.sha256(key.translate(_OPAD))
 
     def _message(self, *, file_id: str, owner_id: str, expires_at: int) -> bytes:
         return f"{file_id}:{owner_id}:{expires_at}".encode("utf-8")
 
-    def sign(self, *, file_id: str, owner_id: str, expires_at: int) -> str:
+    def sign_bytes(self, *, file_id: str, owner_id: str, expires_at: int) -> bytes:
         msg = self._message(file_id=file_id, owner_id=owner_id, expires_at=expires_at)
-        return hmac.new(self.secret_key, msg, hashlib.sha256).hexdigest()
+        inner = self._inner.copy()
+        inner.update(msg)
+        outer = self._outer.copy()
+        outer.update(inner.digest())
+        return outer.digest()
+
+    def sign(self, *, file_id: str, owner_id: str, expires_at: int) -> str:
+        return self.sign_bytes(file_id=file_id, owner_id=owner_id, expires_at=expires_at).hex()
 
     def verify(self, *, file_id: str, owner_id: str, expires_at: int, signature: str) -> bool:
-        expected = self.sign(file_id=file_id, owner_id=owner_id, expires_at=expires_at)
-        return hmac.compare_digest(expected, signature)
+        # bytes.fromhex also accepts whitespace and uppercase; only the exact form that
+        # sign() produces is valid.
+        if len(signature) != _SIGNATURE_HEX_LEN or not _HEX_LOWER.issuperset(signature):
+            return False
+        provided = bytes.fromhex(signature)
+        expected = self.sign_bytes(file_id=file_id, owner_id=owner_id, expires_at=expires_at)
+        return hmac.compare_digest(expected, provided)
+
+
+@lru_cache
+def get_signer(secret_key: str) -> URLSigner:
+    return URLSigner(secret_key)
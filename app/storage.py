@@ -1,8 +1,28 @@
+import os
+from contextlib import suppress
 from pathlib import Path
-from uuid import uuid4
 
+import aiofiles
+import aiofiles.os
 from fastapi import UploadFile
 
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+def new_file_id() -> str:
+    # 128 random bits in the familiar 8-4-4-4-12 layout, without uuid.UUID's object overhead.
+    h = os.urandom(16).hex()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
+def file_suffix(filename: str) -> str:
+    # Same result as Path(filename).suffix for ordinary names, but never lets a path
+    # separator from the client-supplied name into the stored file name.
+    head, dot, ext = filename.rpartition(".")
+    if not (dot and ext and head) or head[-1] in "/\\" or "/" in ext or "\\" in ext:
+        return ""
+    return f".{ext}"
+
 
 class LocalPrivateStorage:
     def __init__(self, root_dir: str):
@@ -10,27 +30,34 @@ class LocalPrivateStorage:
 
     def init(self) -> None:
         self.root.mkdir(parents=True, exist_ok=True)
+        # Resolved once here so save_file can build absolute paths without touching the disk.
+        self.root = self.root.resolve()
 
-    def _owner_dir(self, owner_id: str) -> Path:
+    async def _owner_dir(self, owner_id: str) -> Path:
         owner_path = self.root / owner_id
-        owner_path.mkdir(parents=True, exist_ok=True)
+        await aiofiles.os.makedirs(owner_path, exist_ok=True)
         return owner_path
 
-    def save_file(self, *, owner_id: str, source: UploadFile, max_size_bytes: int) -> tuple[str, Path, int]:
-        file_id = str(uuid4())
-        suffix = Path(source.filename or "").suffix
-        target = self._owner_dir(owner_id) / f"{file_id}{suffix}"
+    async def save_file(self, *, owner_id: str, source: UploadFile, max_size_bytes: int) -> tuple[str, str, int]:
+        if source.size is not None and source.size > max_size_bytes:
+            raise ValueError("File exceeds max upload size")
+
+        file_id = new_file_id()
+        suffix = file_suffix(source.filename or "")
+        target = await self._owner_dir(owner_id) / f"{file_id}{suffix}"
 
         total = 0
-        with target.open("wb") as f:
+        async with aiofiles.open(target, "wb") as f:
             while True:
-                chunk = source.file.read(1024 * 1024)
+                chunk = await source.read(COPY_CHUNK_SIZE)
                 if not chunk:
                     break
                 total += len(chunk)
                 if total > max_size_bytes:
-                    f.close()
-                    target.unlink(missing_ok=True)
-                    raise ValueError("File exceeds max upload size")
-                f.write(chunk)
-        return file_id, target, total
+                    break
+                await f.write(chunk)
+        if total > max_size_bytes:
+            with suppress(FileNotFoundError):
+                await aiofiles.os.remove(target)
+            raise ValueError("File exceeds max upload size")
+        return file_id, str(target), total
@@ -36,6 +36,7 @@ def test_upload_and_list_files(tmp_path, monkeypatch):
         assert payload["owner_id"] == "u-1"
         assert payload["filename"] == "hello.txt"
         assert payload["size"] == 11
+        assert isinstance(payload["uploaded_at"], int)
 
         listing = client.get("/v1/users/u-1/files")
         assert listing.status_code == 200
@@ -71,6 +72,66 @@ def test_signed_url_download_and_expiry(tmp_path, monkeypatch):
         assert expired.json()["error"]["message"] == "link expired"
 
 
+def test_signed_url_escapes_owner_id(tmp_path, monkeypatch):
+    client, _ = build_client(tmp_path, monkeypatch)
+    with client:
+        upload = client.post(
+            "/v1/files/upload",
+            data={"user_id": "u a&b=c"},
+            files={"file": ("note.txt", b"escaped", "text/plain")},
+        )
+        file_id = upload.json()["file_id"]
+
+        sign = client.post(
+            f"/v1/files/{file_id}/sign",
+            json={"owner_id": "u a&b=c", "ttl_seconds": 600},
+        )
+        signed_url = sign.json()["signed_url"]
+        assert "owner_id=u+a%26b%3Dc&" in signed_url
+
+        download = client.get(signed_url)
+        assert download.status_code == 200
+        assert download.content == b"escaped"
+
+
+def test_download_missing_content_returns_not_found(tmp_path, monkeypatch):
+    client, _ = build_client(tmp_path, monkeypatch)
+    with client:
+        upload = client.post(
+            "/v1/files/upload",
+            data={"user_id": "u-gone"},
+            files={"file": ("gone.txt", b"gone", "text/plain")},
+        )
+        file_id = upload.json()["file_id"]
+        sign = client.post(
+            f"/v1/files/{file_id}/sign",
+            json={"owner_id": "u-gone", "ttl_seconds": 600},
+        )
+        for stored in (tmp_path / "private" / "u-gone").iterdir():
+            stored.unlink()
+
+        download = client.get(sign.json()["signed_url"])
+        assert download.status_code == 404
+        assert download.json()["error"]["message"] == "file content missing"
+
+
+def test_apps_sharing_settings_survive_each_others_shutdown(tmp_path, monkeypatch):
+    first, _ = build_client(tmp_path, monkeypatch)
+    second = TestClient(create_app())
+    with second:
+        with first:
+            upload = first.post(
+                "/v1/files/upload",
+                data={"user_id": "u-shared"},
+                files={"file": ("shared.txt", b"shared", "text/plain")},
+            )
+            assert upload.status_code == 201
+
+        listing = second.get("/v1/users/u-shared/files")
+        assert listing.status_code == 200
+        assert [f["file_id"] for f in listing.json()["files"]] == [upload.json()["file_id"]]
+
+
 def test_sign_records_audit_event(tmp_path, monkeypatch):
     client, db_path = build_client(tmp_path, monkeypatch)
     with client:
@@ -93,6 +154,35 @@ def test_sign_records_audit_event(tmp_path, monkeypatch):
     assert count == 1
 
 
+def test_sign_by_non_owner_is_forbidden_and_not_audited(tmp_path, monkeypatch):
+    client, db_path = build_client(tmp_path, monkeypatch)
+    with client:
+        upload = client.post(
+            "/v1/files/upload",
+            data={"user_id": "u-owner"},
+            files={"file": ("audit.txt", b"audit", "text/plain")},
+        )
+        file_id = upload.json()["file_id"]
+
+        sign = client.post(
+            f"/v1/files/{file_id}/sign",
+            json={"owner_id": "u-intruder", "ttl_seconds": 600},
+        )
+        assert sign.status_code == 403
+        assert sign.json()["error"]["code"] == "forbidden"
+
+        missing = client.post(
+            "/v1/files/non-existent-file/sign",
+            json={"owner_id": "u-owner", "ttl_seconds": 600},
+        )
+        assert missing.status_code == 404
+
+    conn = sqlite3.connect(db_path)
+    count = conn.execute("SELECT COUNT(*) FROM link_audit").fetchone()[0]
+    conn.close()
+    assert count == 0
+
+
 def test_sign_rejects_ttl_below_minimum(tmp_path, monkeypatch):
     client, _ = build_client(tmp_path, monkeypatch)
     with client:
@@ -0,0 +1,108 @@
+import sqlite3
+import time
+
+import pytest
+
+from app.repository import MAX_SQL_VARIABLES, FileRepository
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return tmp_path / "metadata.db"
+
+
+@pytest.fixture
+def repository(db_path):
+    repository = FileRepository(str(db_path))
+    repository.init()
+    yield repository
+    repository.close()
+
+
+def create_files(repository, *file_ids):
+    for file_id in file_ids:
+        repository.create_file(
+            file_id=file_id,
+            owner_id="u-1",
+            filename=f"{file_id}.txt",
+            storage_path=f"/{file_id}",
+            size=1,
+        )
+
+
+def test_batch_get_files_and_record_link_generation(repository, db_path):
+    create_files(repository, "f-1", "f-2")
+
+    assert repository.batch_get_files([]) == {}
+    found = repository.batch_get_files(["f-1", "f-2", "missing"])
+    assert set(found) == {"f-1", "f-2"}
+    assert found["f-2"]["filename"] == "f-2.txt"
+
+    repository.batch_record_link_generation([("f-1", "u-1", 60), ("f-2", "u-1", 120)])
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT file_id, ttl_seconds FROM link_audit ORDER BY file_id").fetchall()
+    conn.close()
+    assert rows == [("f-1", 60), ("f-2", 120)]
+
+
+def test_list_files_for_owner_orders_same_second_uploads_newest_first(repository, monkeypatch):
+    monkeypatch.setattr(time, "time", lambda: 1_800_000_000.5)
+    create_files(repository, "f-0", "f-1", "f-2")
+
+    assert [row["file_id"] for row in repository.list_files_for_owner("u-1")] == ["f-2", "f-1", "f-0"]
+
+
+@pytest.fixture
+def legacy_db(db_path):
+    # Schema from before timestamps became INTEGER epoch seconds.
+    conn = sqlite3.connect(db_path)
+    conn.executescript(
+        """
+        CREATE TABLE files (
+            file_id TEXT PRIMARY KEY,
+            owner_id TEXT NOT NULL,
+            filename TEXT NOT NULL,
+            storage_path TEXT NOT NULL UNIQUE,
+            size INTEGER NOT NULL,
+            uploaded_at TEXT NOT NULL
+        );
+        CREATE TABLE link_audit (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            file_id TEXT NOT NULL,
+            owner_id TEXT NOT NULL,
+            ttl_seconds INTEGER NOT NULL,
+            generated_at TEXT NOT NULL
+        );
+        CREATE INDEX idx_files_owner_uploaded ON files(owner_id, uploaded_at DESC);
+        INSERT INTO files VALUES ('f-old', 'u-1', 'old.txt', '/old', 1, '2026-02-24T18:48:09.849921+00:00');
+        INSERT INTO files VALUES ('f-mid', 'u-1', 'mid.txt', '/mid', 1, '1792083586');
+        INSERT INTO link_audit(file_id, owner_id, ttl_seconds, generated_at)
+        VALUES ('f-old', 'u-1', 60, '2026-02-24T18:48:09+00:00');
+        """
+    )
+    conn.close()
+
+
+def test_init_migrates_text_timestamps_to_epoch_seconds(legacy_db, repository, db_path):
+    # legacy_db is requested first so the old schema exists before repository.init() runs.
+    create_files(repository, "f-new")
+    files = repository.list_files_for_owner("u-1")
+
+    assert [row["file_id"] for row in files] == ["f-new", "f-mid", "f-old"]
+    assert files[1]["uploaded_at"] == 1792083586
+    assert files[2]["uploaded_at"] == 1771958889
+    assert all(type(row["uploaded_at"]) is int for row in files)
+
+    conn = sqlite3.connect(db_path)
+    audit = conn.execute("SELECT typeof(generated_at), generated_at FROM link_audit").fetchone()
+    indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    conn.close()
+    assert audit == ("integer", 1771958889)
+    assert {"idx_files_owner_uploaded_at", "idx_link_audit_file"} <= indexes
+    assert "idx_files_owner_uploaded" not in indexes
+
+
+def test_batch_get_files_splits_large_id_lists(repository):
+    create_files(repository, "f-1")
+    file_ids = [f"missing-{i}" for i in range(2 * MAX_SQL_VARIABLES + 1)] + ["f-1"]
+    assert list(repository.batch_get_files(file_ids)) == ["f-1"]
@@ -0,0 +1,38 @@
+import hashlib
+import hmac
+
+import pytest
+
+from app.signing import URLSigner
+
+
+@pytest.mark.parametrize("secret", ["", "test-secret", "k" * 64, "k" * 65, "long-" * 40])
+def test_sign_matches_stdlib_hmac_sha256(secret):
+    signer = URLSigner(secret)
+    expected = hmac.new(secret.encode("utf-8"), b"f-1:u-1:1770000000", hashlib.sha256).hexdigest()
+    assert signer.sign(file_id="f-1", owner_id="u-1", expires_at=1770000000) == expected
+    assert signer.verify(file_id="f-1", owner_id="u-1", expires_at=1770000000, signature=expected)
+    assert not signer.verify(file_id="f-1", owner_id="u-1", expires_at=1770000001, signature=expected)
+
+
+def _valid_signature() -> str:
+    return URLSigner("test-secret").sign(file_id="f-1", owner_id="u-1", expires_at=1770000000)
+
+
+@pytest.mark.parametrize(
+    "signature",
+    [
+        "",
+        "invalid",
+        "zz" * 32,
+        "ab" * 31,
+        "ab" * 33,
+        _valid_signature().upper(),
+        " ".join(_valid_signature()[i : i + 2] for i in range(0, 64, 2)),
+        _valid_signature() + " ",
+        " " + _valid_signature()[1:],
+    ],
+)
+def test_verify_rejects_malformed_signature(signature):
+    signer = URLSigner("test-secret")
+    assert not signer.verify(file_id="f-1", owner_id="u-1", expires_at=1770000000, signature=signature)
@@ -0,0 +1,37 @@
+import asyncio
+import io
+
+import pytest
+from fastapi import UploadFile
+
+from app.storage import LocalPrivateStorage, file_suffix
+
+
+@pytest.mark.parametrize(
+    ("filename", "expected"),
+    [
+        ("report.pdf", ".pdf"),
+        ("archive.tar.gz", ".gz"),
+        ("dir/notes.txt", ".txt"),
+        ("noext", ""),
+        ("trailing.", ""),
+        (".bashrc", ""),
+        ("dir/.bashrc", ""),
+        ("a.b/c", ""),
+        ("a.b\\c", ""),
+        ("", ""),
+    ],
+)
+def test_file_suffix(filename, expected):
+    assert file_suffix(filename) == expected
+
+
+def test_save_file_caps_undeclared_size_while_streaming(tmp_path):
+    storage = LocalPrivateStorage(str(tmp_path / "private"))
+    storage.init()
+    source = UploadFile(file=io.BytesIO(b"a" * 1_000_001), filename="huge.bin")
+
+    with pytest.raises(ValueError):
+        asyncio.run(storage.save_file(owner_id="u-stream", source=source, max_size_bytes=1_000_000))
+
+    assert list((tmp_path / "private" / "u-stream").iterdir()) == []